@@ -2,27 +2,64 @@ import re
 import json
 import os
 import sys
+import heapq
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
-from dataclasses import dataclass
-from trainline_ticket_digital_config import get_trainline_configuration
+from trainline_ticket_digital_config import OperatorConfig, TicketField, get_trainline_configuration
 from config import tesseract_path
 from typing import Dict, List, Optional, Tuple, Any
 
+try:
+    from rapidfuzz import fuzz, process, utils as fuzz_utils
+except ImportError:  # rapidfuzz is optional; fall back to the simple character overlap matcher
+    fuzz = process = fuzz_utils = None
+
 # Path to tesseract executable
 pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
+# Tesseract's OpenMP pool slows down small images; keep each OCR call single-threaded
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 # Debug mode flag - will be set from command line
 DEBUG_ROI = False
 DEBUG_DIR = "debug_roi_images"
 
-@dataclass
-class TicketField:
-    name: str
-    patterns: List[str]
-    region: Optional[Tuple[float, float, float, float]] = None  # x1, y1, x2, y2 as ratios of width/height
+# Longest side used when measuring coarse ticket type features
+FEATURE_MAX_SIDE = 512
+
+# Text indicators used to pick a ticket configuration, in priority order
+CONFIG_INDICATORS = {
+    "gwr": ["great western", "gwr"],
+    "lner": ["lner", "london north eastern"],
+    "tfl": ["transport for london", "tfl", "oyster"],
+    "avanti": ["avanti", "west coast"],
+    "trainline_app": ["trainline", "mobile ticket", "qr code"],
+}
+CONFIG_INDICATOR_PRIORITY = {
+    indicator: (priority, config_name)
+    for priority, (config_name, indicators) in enumerate(CONFIG_INDICATORS.items())
+    for indicator in indicators
+}
+# Zero-width lookahead so indicators overlapping an earlier match are still reported
+CONFIG_INDICATOR_RE = re.compile(
+    "(?=(" + "|".join(re.escape(indicator) for indicator in CONFIG_INDICATOR_PRIORITY) + "))"
+)
+
+#TODO: Add station list in a separate file and use it for validation
+# Example simple station name list (replace with comprehensive version)
+KNOWN_STATIONS = ["London Paddington", "Bristol Temple Meads", "Reading", "Oxford",
+                  "Grantham", "Liverpool Lime Street", "Manchester Piccadilly"]
+
+# Date layouts accepted when standardising extracted dates
+DATE_FORMAT_PATTERNS = [
+    re.compile(r'(\d{1,2})[/\-\.](\d{1,2})[/\-\.](\d{2,4})'),  # DD/MM/YYYY or similar
+    re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)\s+(\d{2,4})')  # 1st Jan 2023
+]
 
 
 class TicketScanner:
@@ -35,12 +72,22 @@ class TicketScanner:
         :param debug_dir: Directory to save ROI debug images.
         """
         self.configurations = configurations or self._get_default_configurations()
+        # Extraction loops over the fields column by column
+        self._operator_configs = {config_name: OperatorConfig.from_fields(fields)
+                                  for config_name, fields in self.configurations.items()}
         self.ticket_type = None
         self.extracted_data = {}
         self.confidence_scores = {}
         self.preprocessed_image = None
+        self._type_features = None
+        self._cv_cache = {}
         self.debug_roi = debug_roi
         self.debug_dir = debug_dir
+        self._known_stations = KNOWN_STATIONS
+        self._station_masks = {station: _letter_mask(station) for station in self._known_stations}
+        self._clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+        self._qr_detector = cv2.QRCodeDetector()
+        self._debug_pool = None
         
         # Create debug directory if it doesn't exist
         if self.debug_roi and not os.path.exists(self.debug_dir):
@@ -60,29 +107,47 @@ class TicketScanner:
             
         # Get the image filename for debug naming
         self.image_basename = os.path.splitext(os.path.basename(image_path))[0]
-
-        # Determine ticket type (paper vs digital)
+        # Derived images and results are only valid for the image being scanned
+        self._cv_cache = {}
+        self.extracted_data = {}
+        self.confidence_scores = {}
+        
+        if not self.debug_roi:
+            return self._scan_image(original_image)
+        
+        # Debug images are written in the background so scanning does not wait on disk IO
+        self._debug_pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            return self._scan_image(original_image)
+        finally:
+            self._debug_pool.shutdown(wait=True)
+            self._debug_pool = None
+    
+    def _scan_image(self, original_image):
+        """
+        Analyse a loaded ticket image.
+        
+        :param original_image: Image as loaded from disk
+        :return: Dictionary with extracted ticket details and metadata
+        """
+        # Determine ticket type (paper vs digital) from visual features
         self.ticket_type = self._determine_ticket_type(original_image)
-        # Preprocess based on ticket type
-        self.preprocessed_image = self._preprocess_image(original_image)
+        working_image = self._prepare_working_image(original_image)
         
-        # Crop the ticket if possible
-        cropped_image = self._crop_ticket(self.preprocessed_image)
-        if cropped_image is not None:
-            working_image = cropped_image
-            
-            # Save cropped image if debugging
-            if self.debug_roi:
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_cropped.jpg")
-                cv2.imwrite(debug_path, cropped_image)
-        else:
-            working_image = self.preprocessed_image
+        # OCR the whole ticket once; the text is shared by type detection, configuration selection
+        # and field extraction, which reads each field's words from their positions on the page
+        full_text, words = self._ocr_words(working_image)
+        if self._apply_text_features(full_text):
+            # Text revealed a different ticket type, so preprocess again for that type
+            working_image = self._prepare_working_image(original_image)
+            # The word positions belong to the previous crop
+            words = None
         
         # Select the appropriate configuration based on detected ticket type
-        config_name = self._select_configuration(working_image)
+        config_name = self._select_configuration(full_text)
         
         # Extract ticket details
-        self.extracted_data = self._extract_ticket_details(working_image, config_name)
+        self.extracted_data = self._extract_ticket_details(working_image, config_name, full_text, words)
         
         # Post-process and validate the extracted data
         #self._validate_and_correct_data()
@@ -94,10 +159,191 @@ class TicketScanner:
         return {
             "ticket_type": self.ticket_type,
             "configuration_used": config_name,
-            "data": self.extracted_data,
-            "confidence": self.confidence_scores
+            # Copies, so a later scan on this scanner cannot change a returned result
+            "data": dict(self.extracted_data),
+            "confidence": dict(self.confidence_scores)
         }
     
+    def _save_debug_image(self, suffix, image):
+        """
+        Queue a debug image for writing to the debug directory.
+        
+        Outside scan() there is no background pool, so the image is written straight away.
+        
+        :param suffix: Name appended to the image basename
+        :param image: Image to save; a copy is queued so callers may keep drawing on it
+        """
+        debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_{suffix}.jpg")
+        if self._debug_pool is None:
+            cv2.imwrite(debug_path, image)
+        else:
+            self._debug_pool.submit(cv2.imwrite, debug_path, image.copy())
+    
+    def _prepare_working_image(self, original_image):
+        """
+        Preprocess the image for the current ticket type and crop the ticket out of it.
+        
+        :param original_image: Image as loaded from disk
+        :return: Cropped ticket, or the whole preprocessed image if cropping failed
+        """
+        # Preprocess based on ticket type
+        self.preprocessed_image = self._preprocess_image(original_image)
+        
+        # Crop the ticket if possible
+        cropped_image = self._crop_ticket(self.preprocessed_image)
+        if cropped_image is None:
+            return self.preprocessed_image
+        
+        # Save cropped image if debugging
+        if self.debug_roi:
+            self._save_debug_image("cropped", cropped_image)
+        return cropped_image
+    
+    @classmethod
+    def scan_many(cls, image_paths, max_workers=None, **scanner_kwargs):
+        """
+        Scan several ticket images in parallel, one single-threaded Tesseract per process.
+        
+        :param image_paths: Paths to the ticket images
+        :param max_workers: Number of worker processes (defaults to the CPU count)
+        :param scanner_kwargs: Keyword arguments used to build each worker's scanner
+        :return: List of scan results in the same order as image_paths
+        """
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_init_scan_worker,
+                                 initargs=(cls, scanner_kwargs)) as executor:
+            return list(executor.map(_scan_one, image_paths))
+    
+    def _ocr(self, image, config=""):
+        """
+        Run Tesseract on an image (or ROI) and return the recognised text.
+        
+        Together with _ocr_data this is the only place Tesseract is called, so the OCR
+        engine can be swapped here.
+        
+        :param image: Image as numpy array, or path of an image or image list file
+        :param config: Extra Tesseract command line options
+        :return: OCR text
+        """
+        return pytesseract.image_to_string(image, config=config)
+    
+    def _ocr_data(self, image, config=""):
+        """
+        Run Tesseract on an image and return each recognised word with its box.
+        
+        :param image: Image as numpy array
+        :param config: Extra Tesseract command line options
+        :return: Dictionary of word attribute lists, as from pytesseract.image_to_data
+        """
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+    
+    def _ocr_words(self, image, config=""):
+        """
+        Run Tesseract on an image and return the recognised text along with where each word is.
+        
+        :param image: Image as numpy array
+        :param config: Extra Tesseract command line options
+        :return: Tuple of (OCR text, words) where words is a tuple of (word texts, Nx2 array of word
+                 centres as ratios of the image size, line of each word)
+        """
+        data = self._ocr_data(image, config)
+        height, width = image.shape[:2]
+        keep = [i for i, text in enumerate(data["text"]) if text.strip()]
+        texts = [data["text"][i].strip() for i in keep]
+        line_keys = [(data["block_num"][i], data["par_num"][i], data["line_num"][i]) for i in keep]
+        boxes = np.array([[data["left"][i], data["top"][i], data["width"][i], data["height"][i]] for i in keep],
+                         dtype=np.float64).reshape(-1, 4)
+        centres = (boxes[:, :2] + boxes[:, 2:] / 2) / (width, height)
+        
+        lines = {}
+        for text, line_key in zip(texts, line_keys):
+            lines.setdefault(line_key, []).append(text)
+        return "\n".join(" ".join(line_words) for line_words in lines.values()), (texts, centres, line_keys)
+    
+    def _ocr_batch(self, images, config=""):
+        """
+        Run Tesseract once over several images.
+        
+        Tesseract accepts a text file listing image paths and separates the
+        text of each page with a form feed, so start-up is paid once per batch.
+        
+        :param images: List of images as numpy arrays
+        :param config: Extra Tesseract command line options
+        :return: List of OCR texts, one per image
+        """
+        if len(images) <= 1:
+            return [self._ocr(image, config) for image in images]
+        
+        with tempfile.TemporaryDirectory(prefix="ticket_rois_") as tmp_dir:
+            image_paths = []
+            for i, image in enumerate(images):
+                image_path = os.path.join(tmp_dir, f"roi_{i}.png")
+                cv2.imwrite(image_path, image)
+                image_paths.append(image_path)
+            
+            list_path = os.path.join(tmp_dir, "rois.txt")
+            with open(list_path, 'w') as f:
+                f.write("\n".join(image_paths) + "\n")
+            
+            text = self._ocr(list_path, config)
+        
+        # Older Tesseract versions also emit a trailing separator after the last page
+        pages = text.split("\f")
+        return (pages + [""] * len(images))[:len(images)]
+    
+    def _cached(self, op, image, compute):
+        """
+        Memoise a derived image for the current scan, keyed on the source array.
+        
+        :param op: Name (and parameters) of the operation
+        :param image: Source image as numpy array
+        :param compute: Callable producing the derived value
+        :return: The cached or freshly computed value
+        """
+        key = (op, id(image))
+        entry = self._cv_cache.get(key)
+        # Keep a reference to the source so its id cannot be reused while cached
+        if entry is None or entry[0] is not image:
+            entry = (image, compute())
+            self._cv_cache[key] = entry
+        return entry[1]
+    
+    def _gray_of(self, image):
+        """
+        Grayscale version of a BGR (or already grayscale) image.
+        """
+        return self._cached("gray", image,
+                            lambda: image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    
+    def _edges_of(self, image):
+        """
+        Canny edge map of a grayscale image.
+        """
+        return self._cached("canny", image, lambda: cv2.Canny(image, 50, 150))
+    
+    def _lines_of(self, edges, scale=1.0):
+        """
+        Probabilistic Hough line segments of an edge map.
+        
+        :param edges: Edge map as numpy array
+        :param scale: Size of the edge map relative to the original image; pixel thresholds shrink with it
+        """
+        return self._cached(("hough", scale), edges,
+                            lambda: cv2.HoughLinesP(edges, 1, np.pi/180, max(1, int(100 * scale)),
+                                                    minLineLength=100 * scale, maxLineGap=10 * scale))
+    
+    @staticmethod
+    def _angle_variation(lines):
+        """
+        Standard deviation of the angles of Hough line segments.
+        
+        :param lines: HoughLinesP output of shape (N, 1, 4)
+        :return: Angle spread in radians (0 when there are no lines)
+        """
+        segments = lines.reshape(-1, 4)
+        angles = np.arctan2(segments[:, 3] - segments[:, 1], segments[:, 2] - segments[:, 0])
+        return float(angles.std()) if angles.size else 0.0
+    
     def _determine_ticket_type(self, image):
         """
         Determine if an image is a paper or digital train ticket.
@@ -105,14 +351,16 @@ class TicketScanner:
         :param image: The input image as numpy array
         :return: "paper" or "digital"
         """
-        # Convert to RGB for consistent processing
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            # If grayscale, convert to RGB
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        # Work directly on the BGR image; grayscale inputs skip the colour-only checks
+        is_color = len(image.shape) == 3 and image.shape[2] == 3
         
-        height, width, _ = rgb_image.shape
+        # Colour, edge and lighting features are coarse, so measure them on a downscaled copy
+        scale = min(1.0, FEATURE_MAX_SIDE / max(image.shape[:2]))
+        if scale < 1.0:
+            small_image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small_image = image
+        height = small_image.shape[0]
         
         # Feature extraction for ticket type classification
         features = {
@@ -123,110 +371,115 @@ class TicketScanner:
             "digital_elements": 0
         }
         
-        # 1. Check for orange bar (top region)
-        top_region = rgb_image[:height // 10, :, :]
+        # 1. Check for QR codes; a decodable code is only found on digital tickets
+        # OpenCV QR detector on the full resolution grayscale, shared with the texture check
+        gray = self._gray_of(image)
+        has_qr, _, _ = self._qr_detector.detectAndDecode(gray)
         
         if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_top_region.jpg")
-            cv2.imwrite(debug_path, cv2.cvtColor(top_region, cv2.COLOR_RGB2BGR))
+            # Binary view of the image, useful when checking why a QR code was missed
+            _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+            self._save_debug_image("threshold", thresh)
             
-        hsv_image = cv2.cvtColor(top_region, cv2.COLOR_RGB2HSV)
+        if has_qr:
+            features["digital_elements"] += 1
+            return self._decide_ticket_type(features, "digital", "qr_code")
+        
+        # 2. Check for orange bar (top region)
+        top_region = small_image[:height // 10]
+        if not is_color:
+            top_region = cv2.cvtColor(top_region, cv2.COLOR_GRAY2BGR)
+        
+        if self.debug_roi:
+            self._save_debug_image("top_region", top_region)
+            
+        hsv_image = cv2.cvtColor(top_region, cv2.COLOR_BGR2HSV)
         lower_orange = np.array([10, 100, 100])
         upper_orange = np.array([25, 255, 255])
         mask = cv2.inRange(hsv_image, lower_orange, upper_orange)
         
         if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_orange_mask.jpg")
-            cv2.imwrite(debug_path, mask)
+            self._save_debug_image("orange_mask", mask)
             
-        orange_pixels = np.count_nonzero(mask)
-        features["orange_bar"] = 1 if (orange_pixels / mask.size) > 0.2 else 0
+        orange_ratio = np.count_nonzero(mask) / mask.size
+        features["orange_bar"] = 1 if orange_ratio > 0.2 else 0
+        if orange_ratio > 0.5:
+            # A strip that is mostly orange is the paper ticket header
+            return self._decide_ticket_type(features, "paper", "orange_bar")
         
-        # 2. Check for paper texture (high frequency components)
-        gray = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+        # 3. Check for paper texture (high frequency components)
+        # Full resolution: downscaling would average away the paper grain being measured
         blur = cv2.GaussianBlur(gray, (5, 5), 0)
-        texture_measure = np.std(gray - blur)
+        texture_image = gray - blur
+        texture_measure = np.std(texture_image)
         
         if self.debug_roi:
-            texture_image = gray - blur
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_texture.jpg")
-            cv2.imwrite(debug_path, texture_image)
+            self._save_debug_image("texture", texture_image)
             
         features["texture"] = 1 if texture_measure > 10 else 0
         
-        # 3. Check for perspective distortion
-        edges = cv2.Canny(gray, 50, 150)
+        # 4. Check for perspective distortion
+        edges = self._edges_of(self._gray_of(small_image))
         
         if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_edges.jpg")
-            cv2.imwrite(debug_path, edges)
+            self._save_debug_image("edges", edges)
             
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, 100, minLineLength=100, maxLineGap=10)
+        lines = self._lines_of(edges, scale)
         if lines is not None:
-            angles = [np.arctan2(line[0][3] - line[0][1], line[0][2] - line[0][0]) for line in lines]
-            angle_variation = np.std(angles) if angles else 0
+            angle_variation = self._angle_variation(lines)
             features["perspective"] = 1 if angle_variation > 0.05 else 0
-        else:
-            features["perspective"] = 0
-
             
             if self.debug_roi:
                 # Draw lines on a copy of the image
-                line_image = rgb_image.copy()
+                line_image = small_image.copy()
                 for line in lines:
                     x1, y1, x2, y2 = line[0]
                     cv2.line(line_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_lines.jpg")
-                cv2.imwrite(debug_path, cv2.cvtColor(line_image, cv2.COLOR_RGB2BGR))
-        
-        # 4. Check for shadows (paper tickets often have uneven lighting)
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            lab_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2LAB)
-            illumination = cv2.split(lab_image)[0]
-            illumination_var = np.std(illumination)
+                self._save_debug_image("lines", line_image)
+        else:
+            features["perspective"] = 0
+        
+        # 5. Check for shadows (paper tickets often have uneven lighting)
+        if is_color:
+            lab_image = cv2.cvtColor(small_image, cv2.COLOR_BGR2LAB)
+            illumination_var = lab_image[:, :, 0].std()
             features["shadow"] = 1 if illumination_var > 15 else 0
         else:
             features["shadow"] = 0
         
-        # 5. Check for digital elements (perfect alignment, QR codes)
-        qr_detected = False
-        # OpenCV QR detector
-        qr_detector = cv2.QRCodeDetector()
-        has_qr, _, _ = qr_detector.detectAndDecode(gray)
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-
-        # Apply binary thresholding to create a black and white image
-        # For QR code detection, a simple binary threshold often works well
-        _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+        # Digital text elements are scored later, once the preprocessed ticket has been OCR'd
+        self._type_features = features
+        return self._classify_ticket_type(features)
+    
+    def _decide_ticket_type(self, features, ticket_type, decided_by):
+        """
+        Record a ticket type settled by a single unambiguous feature.
         
+        :param features: Feature scores measured so far
+        :param ticket_type: "paper" or "digital"
+        :param decided_by: Name of the deciding feature
+        :return: The ticket type
+        """
         if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_threshold.jpg")
-            cv2.imwrite(debug_path, thresh)
-            
-        if has_qr:
-            qr_detected = True
-            features["digital_elements"] += 1
-        else:
-            # Try finding rectangular patterns characteristic of QR codes
-            # Look for a grid of black/white pixels with high contrast
-            blocks = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-            # Count number of small rectangular blocks
-            # If > threshold, likely a QR code
+            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_features.json")
+            with open(debug_path, 'w') as f:
+                json.dump({
+                    "features": features,
+                    "decided_by": decided_by,
+                    "result": ticket_type
+                }, f, indent=2)
         
-        text = pytesseract.image_to_string(image)
+        # Text found later cannot override an unambiguous visual signal
+        self._type_features = None
+        return ticket_type
+    
+    def _classify_ticket_type(self, features):
+        """
+        Combine ticket type features into a paper vs digital decision.
         
-        # Save OCR result for debugging
-        if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_ocr_text.txt")
-            with open(debug_path, 'w') as f:
-                f.write(text)
-                
-        if any(pattern in text.lower() for pattern in ["add to wallet", "google wallet", "show railcard", "eticket"]):
-            features["digital_elements"] += 2.0
-
+        :param features: Feature scores from _determine_ticket_type
+        :return: "paper" or "digital"
+        """
         # Calculate paper vs digital score
         paper_score = (
             features["orange_bar"] * 1.5 + 
@@ -245,9 +498,33 @@ class TicketScanner:
                     "result": "paper" if paper_score > 0.5 else "digital"
                 }, f, indent=2)
         
-
         return "paper" if paper_score > 0.5 else "digital"
     
+    def _apply_text_features(self, text):
+        """
+        Revise the ticket type using text found on the preprocessed ticket.
+        
+        :param text: OCR text of the working image
+        :return: True if the ticket type changed
+        """
+        # Save OCR result for debugging
+        if self.debug_roi:
+            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_ocr_text.txt")
+            with open(debug_path, 'w') as f:
+                f.write(text)
+                
+        if self._type_features is None:
+            return False
+        
+        if not any(pattern in text.lower() for pattern in ["add to wallet", "google wallet", "show railcard", "eticket"]):
+            return False
+        
+        self._type_features["digital_elements"] += 2.0
+        ticket_type = self._classify_ticket_type(self._type_features)
+        changed = ticket_type != self.ticket_type
+        self.ticket_type = ticket_type
+        return changed
+    
     def _preprocess_image(self, image):
         """
         Preprocess the image based on detected ticket type.
@@ -257,11 +534,10 @@ class TicketScanner:
         """
         if self.ticket_type == "paper":
             # Paper ticket preprocessing
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = self._gray_of(image)
             
             if self.debug_roi:
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_gray.jpg")
-                cv2.imwrite(debug_path, gray)
+                self._save_debug_image("gray", gray)
             
             # Adaptive thresholding to handle varying lighting
             thresh = cv2.adaptiveThreshold(
@@ -270,18 +546,15 @@ class TicketScanner:
             )
             
             if self.debug_roi:
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_adaptive_thresh.jpg")
-                cv2.imwrite(debug_path, thresh)
+                self._save_debug_image("adaptive_thresh", thresh)
             
             # Check if perspective correction is needed
-            edges = cv2.Canny(thresh, 50, 150)
-            lines = cv2.HoughLinesP(edges, 1, np.pi/180, 100, minLineLength=100, maxLineGap=10)
+            edges = self._edges_of(thresh)
+            lines = self._lines_of(edges)
             
             # If we have clear lines and they're not perfectly horizontal/vertical
             if lines is not None:
-                angles = [np.arctan2(line[0][3] - line[0][1], line[0][2] - line[0][0]) 
-                          for line in lines]
-                angle_variation = np.std(angles)
+                angle_variation = self._angle_variation(lines)
                 
                 if angle_variation > 0.1:  # Significant variation - needs deskewing
                     # Find the largest contour (presumably the ticket)
@@ -289,22 +562,21 @@ class TicketScanner:
                     if contours:
                         largest_contour = max(contours, key=cv2.contourArea)
                         rect = cv2.minAreaRect(largest_contour)
+                        # boxPoints already returns float32, as getPerspectiveTransform expects
                         box = cv2.boxPoints(rect)
-                        box = np.int32(box)
                         
                         if self.debug_roi:
                             # Draw contour on original image
                             contour_image = image.copy()
-                            cv2.drawContours(contour_image, [box], 0, (0, 255, 0), 2)
-                            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_largest_contour.jpg")
-                            cv2.imwrite(debug_path, contour_image)
+                            cv2.drawContours(contour_image, [box.astype(np.int32)], 0, (0, 255, 0), 2)
+                            self._save_debug_image("largest_contour", contour_image)
                         
                         # Get width and height of the detected rectangle
                         width = int(rect[1][0])
                         height = int(rect[1][1])
                         
                         # Create perspective transform matrix
-                        src_pts = box.astype("float32")
+                        src_pts = box
                         dst_pts = np.array([[0, height-1],
                                            [0, 0],
                                            [width-1, 0],
@@ -315,8 +587,7 @@ class TicketScanner:
                         warped = cv2.warpPerspective(image, M, (width, height))
                         
                         if self.debug_roi:
-                            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_warped.jpg")
-                            cv2.imwrite(debug_path, warped)
+                            self._save_debug_image("warped", warped)
                         
                         return warped
             
@@ -326,15 +597,12 @@ class TicketScanner:
         else:  # Digital ticket
             # For digital tickets, simple noise reduction and contrast enhancement
             lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-            cl = clahe.apply(l)
-            enhanced_lab = cv2.merge((cl, a, b))
-            enhanced_bgr = cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
+            # Equalise the lightness plane in place instead of splitting and merging channels
+            lab[:, :, 0] = self._clahe.apply(lab[:, :, 0])
+            enhanced_bgr = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=lab)
             
             if self.debug_roi:
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_enhanced.jpg")
-                cv2.imwrite(debug_path, enhanced_bgr)
+                self._save_debug_image("enhanced", enhanced_bgr)
             
             return enhanced_bgr
     
@@ -346,17 +614,13 @@ class TicketScanner:
         :return: Cropped ticket image or None if unsuccessful
         """
         # Convert to grayscale if it's not already
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
+        gray = self._gray_of(image)
             
         # Apply edge detection
-        edges = cv2.Canny(gray, 50, 150)
+        edges = self._edges_of(gray)
         
         if self.debug_roi:
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_crop_edges.jpg")
-            cv2.imwrite(debug_path, edges)
+            self._save_debug_image("crop_edges", edges)
         
         # Find contours and select the largest rectangular one
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -364,17 +628,17 @@ class TicketScanner:
         if not contours:
             return None
             
-        # Sort contours by area, largest first
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
+        # Only the 5 largest contours are considered, so avoid sorting all of them
+        largest_contours = heapq.nlargest(5, contours, key=cv2.contourArea)
+        image_area = image.shape[0] * image.shape[1]
         
         if self.debug_roi:
             # Draw all contours
             contour_image = image.copy()
-            cv2.drawContours(contour_image, contours[:5], -1, (0, 255, 0), 2)
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_all_contours.jpg")
-            cv2.imwrite(debug_path, contour_image)
+            cv2.drawContours(contour_image, largest_contours, -1, (0, 255, 0), 2)
+            self._save_debug_image("all_contours", contour_image)
         
-        for contour in contours[:5]:  # Check the 5 largest contours
+        for contour in largest_contours:  # Check the 5 largest contours
             # Approximate the contour
             peri = cv2.arcLength(contour, True)
             approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
@@ -390,72 +654,63 @@ class TicketScanner:
                 
                 if valid_ratio:
                     # Ensure it's not too small
-                    if w * h > (image.shape[0] * image.shape[1] * 0.2):  # At least 20% of image
+                    if w * h > (image_area * 0.2):  # At least 20% of image
                         if self.debug_roi:
                             # Draw selected contour
                             rect_image = image.copy()
                             cv2.rectangle(rect_image, (x, y), (x+w, y+h), (0, 0, 255), 2)
-                            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_selected_rect.jpg")
-                            cv2.imwrite(debug_path, rect_image)
+                            self._save_debug_image("selected_rect", rect_image)
                             
                         cropped = image[y:y+h, x:x+w]
                         return cropped
         
         # If we didn't find a suitable contour, use the largest one
-        x, y, w, h = cv2.boundingRect(contours[0])
-        if w * h > (image.shape[0] * image.shape[1] * 0.3):  # At least 30% of image
+        x, y, w, h = cv2.boundingRect(largest_contours[0])
+        if w * h > (image_area * 0.3):  # At least 30% of image
             if self.debug_roi:
                 # Draw fallback contour
                 rect_image = image.copy()
                 cv2.rectangle(rect_image, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_fallback_rect.jpg")
-                cv2.imwrite(debug_path, rect_image)
+                self._save_debug_image("fallback_rect", rect_image)
                 
             return image[y:y+h, x:x+w]
             
         return None  # No valid ticket found
     
-    def _select_configuration(self, image):
+    def _select_configuration(self, text):
         """
         Select the appropriate configuration based on OCR text from the image.
         
-        :param image: The preprocessed image
+        :param text: OCR text of the preprocessed ticket
         :return: Configuration name to use
         """
-        # Run quick OCR to identify ticket issuer/type
-        text = pytesseract.image_to_string(image)
         if self.debug_roi:
             debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_config_ocr.txt")
             with open(debug_path, 'w') as f:
                 f.write(text)
         
-        # Check against known patterns for different ticket types
-        for config_name, indicators in {
-            "gwr": ["great western", "gwr"],
-            "lner": ["lner", "london north eastern"],
-            "tfl": ["transport for london", "tfl", "oyster"],
-            "avanti": ["avanti", "west coast"],
-            "trainline_app": ["trainline", "mobile ticket", "qr code"],
-            "generic_digital": []  # Fallback
-        }.items():
-            if any(indicator in text.lower() for indicator in indicators):
-                return config_name
+        # Find every known indicator in one pass, then pick the highest priority configuration
+        found = {match.group(1) for match in CONFIG_INDICATOR_RE.finditer(text.lower())}
+        if found:
+            return min(CONFIG_INDICATOR_PRIORITY[indicator] for indicator in found)[1]
         
         # Default to generic if no match found
         return "generic_digital"
      
-    def _extract_ticket_details(self, image, config_name):
+    def _extract_ticket_details(self, image, config_name, full_text=None, words=None):
         """
         Extract train ticket details from an image using OCR based on a specific configuration.
         
         :param image: Preprocessed image
         :param config_name: Name of the ticket format configuration to use
+        :param full_text: OCR text of the whole image, if already available
+        :param words: Word positions from _ocr_words for the same image, if already available
         :return: Dictionary with extracted ticket details
         """
         if config_name not in self.configurations:
             config_name = "generic"  # Fallback to generic
         
-        config = self.configurations[config_name]
+        config = self._operator_configs[config_name]
         details = {}
         
         # Get image dimensions for relative region calculations
@@ -490,20 +745,16 @@ class TicketScanner:
                             cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
             
             # Save the grid image
-            debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_grid.jpg")
-            cv2.imwrite(debug_path, grid_image)
+            self._save_debug_image("grid", grid_image)
         
-        # Process each field in the configuration
-        for i, field in enumerate(config):
+        # Absolute coordinates of every region, shared by all scans at this image size
+        regions_px = _resolve_regions(config.regions, width, height)
+        
+        # Crop every field's region up front so all ROIs can be OCR'd in one batch
+        field_rois = []
+        for i, (name, region, (roi_x1, roi_y1, roi_x2, roi_y2)) in enumerate(zip(config.names, config.regions, regions_px)):
             # If region is specified, only OCR that part
-            if field.region:
-                x1, y1, x2, y2 = field.region
-                # Convert relative coordinates to absolute
-                roi_x1 = int(x1 * width)
-                roi_y1 = int(y1 * height)
-                roi_x2 = int(x2 * width)
-                roi_y2 = int(y2 * height)
-                
+            if region:
                 # Extract region of interest
                 roi = image[roi_y1:roi_y2, roi_x1:roi_x2]
                 
@@ -516,48 +767,71 @@ class TicketScanner:
                     # Draw rectangle and text on the debug image
                     cv2.rectangle(debug_image, (roi_x1, roi_y1), (roi_x2, roi_y2), (0, 255, 0), 2)
                     # Add region coordinates as text (in ratio format)
+                    x1, y1, x2, y2 = region
                     coord_text = f"({x1:.1f},{y1:.1f})-({x2:.1f},{y2:.1f})"
-                    cv2.putText(debug_image, f"{field.name}: {coord_text}", (roi_x1, roi_y1-10), 
+                    cv2.putText(debug_image, f"{name}: {coord_text}", (roi_x1, roi_y1-10), 
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
                 
                     # Save the actual ROI
-                    debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_roi_{i}_{field.name}.jpg")
-                    cv2.imwrite(debug_path, roi)
-
-                    # OCR the region
-                text = pytesseract.image_to_string(roi)
+                    self._save_debug_image(f"roi_{i}_{name}", roi)
+            else:
+                # Use full image if no region specified
+                roi = None
+            field_rois.append((i, name, roi))
+        
+        # Save the visualization image with all ROIs
+        if self.debug_roi:
+            self._save_debug_image("all_roi", debug_image)
+        
+        # Match fields against the full-page words inside their region first; only the
+        # fields that find nothing there have their region OCR'd on its own
+        roi_texts = {}
+        roi_values = {}
+        if words is not None:
+            for i, text in self._region_texts(words, config.regions).items():
+                value = config.matchers[i](text)
+                if value is not None:
+                    roi_texts[i] = text
+                    roi_values[i] = value
+        
+        # OCR the remaining regions with one Tesseract invocation per page segmentation mode
+        rois_by_psm = {}
+        for i, _, roi in field_rois:
+            if roi is not None and i not in roi_texts:
+                rois_by_psm.setdefault(config.psms[i], []).append((i, roi))
+        for psm, rois in rois_by_psm.items():
+            # Ticket text is dark on light after preprocessing, so skip Tesseract's inverted retry
+            texts = self._ocr_batch([roi for _, roi in rois], config=f"--psm {psm} -c tessedit_do_invert=0")
+            roi_texts.update(zip([i for i, _ in rois], texts))
+        
+        for i, name, roi in field_rois:
+            if roi is not None:
+                text = roi_texts[i]
                 
                 # Save OCR result for debugging
                 if self.debug_roi:
-                    debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_roi_{i}_{field.name}_text.txt")
+                    debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_roi_{i}_{name}_text.txt")
                     with open(debug_path, 'w') as f:
                         f.write(text)
             else:
-                # Use full image if no region specified
-                text = pytesseract.image_to_string(image)
+                if full_text is None:
+                    full_text = self._ocr(image)
+                text = full_text
             
-            # Rest of the function remains the same...
-            # [Processing logic]
-        
-        # Save the visualization image with all ROIs
-            if self.debug_roi:
-                debug_path = os.path.join(self.debug_dir, f"{self.image_basename}_all_roi.jpg")
-                cv2.imwrite(debug_path, debug_image)
-            
-
             # Try to match each pattern
-            for pattern in field.patterns:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    details[field.name] = match.group(0).strip()
-                    self.confidence_scores[field.name] = 1.0  # High confidence for direct matches
-                    break
+            value = roi_values[i] if i in roi_values else config.matchers[i](text)
+            if value is not None:
+                details[name] = value.strip()
+                self.confidence_scores[name] = 1.0  # High confidence for direct matches
             
             # If no match but field should exist, try fuzzy matching
-            if field.name not in details and text:
+            if name not in details and text:
                 # Simple approach for fuzzy matching
                 #TODO: Implement proper fuzzy matching using fuzzywuzzy or rapidfuzz
-                for pattern in field.patterns:
+                for pattern in config.patterns[i]:
+                    # Finder functions have no text to look for
+                    if not isinstance(pattern, str):
+                        continue
                     # Remove regex special chars
                     clean_pattern = re.sub(r'[\(\)\[\]\{\}\.\+\*\?\|\^\$]', '', pattern)
                     clean_pattern = re.sub(r'\\d\+', '', clean_pattern)
@@ -569,11 +843,35 @@ class TicketScanner:
                         if pos < len(text):
                             # Take the next few words
                             possible_value = text[pos:pos+30].split('\n')[0].strip()
-                            details[field.name] = possible_value
-                            self.confidence_scores[field.name] = 0.6  # Lower confidence
+                            details[name] = possible_value
+                            self.confidence_scores[name] = 0.6  # Lower confidence
                             break
         return details
 
+    
+    @staticmethod
+    def _region_texts(words, regions):
+        """
+        Join the OCR words whose centres fall inside each field's region.
+        
+        :param words: Word positions from _ocr_words
+        :param regions: Relative region of each field, or None for fields without one
+        :return: Dictionary of field index to region text, for fields whose region holds any words
+        """
+        texts, centres, line_keys = words
+        # One row per field, one column per word; fields without a region get an empty box
+        boxes = np.array([region or (0, 0, 0, 0) for region in regions], dtype=np.float64).reshape(-1, 4)
+        centre_x, centre_y = centres[:, 0], centres[:, 1]
+        inside = ((centre_x >= boxes[:, 0:1]) & (centre_x < boxes[:, 2:3]) &
+                  (centre_y >= boxes[:, 1:2]) & (centre_y < boxes[:, 3:4]))
+        
+        region_texts = {}
+        for i in np.flatnonzero(inside.any(axis=1)).tolist():
+            lines = {}
+            for j in np.flatnonzero(inside[i]).tolist():
+                lines.setdefault(line_keys[j], []).append(texts[j])
+            region_texts[i] = "\n".join(" ".join(line_words) for line_words in lines.values())
+        return region_texts
         
     def _validate_and_correct_data(self):
         """
@@ -585,21 +883,26 @@ class TicketScanner:
             #TODO:  Clean up common OCR errors in station names 
             origin = re.sub(r'l\b', '1', origin)  # Replace lone 'l' with '1'
             origin = re.sub(r'0', 'O', origin)    # Replace '0' with 'O' in station names
-            #TODO: Add station list in a separate file and use it for validation
-            # Example simple station name validation (replace with comprehensive version)
-            known_stations = ["London Paddington", "Bristol Temple Meads", "Reading", "Oxford", 
-                             "Grantham", "Liverpool Lime Street", "Manchester Piccadilly"] 
             best_match = None
             best_score = 0
             
-            # Simple string similarity as placeholder
-            for station in known_stations:
-                common_chars = sum(1 for c in origin if c in station)
-                similarity = common_chars / max(len(origin), len(station))
-                
-                if similarity > best_score and similarity > 0.7:
-                    best_score = similarity
-                    best_match = station
+            if process is not None:
+                match = process.extractOne(origin, self._known_stations, scorer=fuzz.WRatio,
+                                           processor=fuzz_utils.default_process, score_cutoff=70)
+                if match:
+                    best_match = match[0]
+                    best_score = match[1] / 100.0
+            else:
+                # Simple string similarity as placeholder: overlap of the letter sets,
+                # one AND per station instead of a character-by-character scan
+                origin_mask = _letter_mask(origin)
+                for station, station_mask in self._station_masks.items():
+                    union = bin(origin_mask | station_mask).count("1")
+                    similarity = bin(origin_mask & station_mask).count("1") / union if union else 0
+                    
+                    if similarity > best_score and similarity > 0.7:
+                        best_score = similarity
+                        best_match = station
             
             if best_match:
                 self.extracted_data['origin_station'] = best_match
@@ -610,13 +913,8 @@ class TicketScanner:
             date_str = self.extracted_data['date']
             
             # Try various date formats
-            date_formats = [
-                r'(\d{1,2})[/\-\.](\d{1,2})[/\-\.](\d{2,4})',  # DD/MM/YYYY or similar
-                r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)\s+(\d{2,4})'  # 1st Jan 2023
-            ]
-            
-            for format_pattern in date_formats:
-                match = re.search(format_pattern, date_str)
+            for format_pattern in DATE_FORMAT_PATTERNS:
+                match = format_pattern.search(date_str)
                 if match:
                     # Standardize to YYYY-MM-DD
                     day, month, year = match.groups()
@@ -668,33 +966,91 @@ class TicketScanner:
         
         :return: Dictionary of ticket configurations
         """
-        configs = {
-            "generic": [
-                TicketField("origin_station", [r"(?:From|Origin)[:\s]+(.+?)(?:\s+to|\s*$|[,\.])", r"ORIGIN[:\s]+(.+?)(?:\s+to|\s*$|[,\.])"], (0.05, 0.2, 0.45, 0.4)),
-                TicketField("destination_station", [r"(?:To|Destination)[:\s]+(.+?)(?:\s*$|[,\.])", r"DESTINATION[:\s]+(.+?)(?:\s*$|[,\.])"], (0.55, 0.2, 0.95, 0.4)),
-                TicketField("date", [r"(?:Date|Valid)[:\s]+([0-9]{1,2}[\/\.\-][0-9]{1,2}[\/\.\-][0-9]{2,4})", r"(?:Date|Valid)[:\s]+([0-9]{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+[0-9]{2,4})"], (0.1, 0.4, 0.9, 0.6)),
-                TicketField("ticket_type", [r"(?:Type|Class)[:\s]+(.+?)(?:\s*$|[,\.])", r"(STANDARD|FIRST|1ST|ANYTIME|OFF-PEAK|SUPER OFF-PEAK)(?:\s+CLASS)?"], (0.1, 0.5, 0.9, 0.7)),
-                TicketField("price", [r"(?:Price|Cost|Fare)[:\s]*£?([0-9]+\.[0-9]{2})", r"£([0-9]+\.[0-9]{2})"], (0.7, 0.7, 0.95, 0.9)),
-                TicketField("ticket_reference", [r"(?:Reference|Ref)[:\s]*([A-Z0-9-]+)", r"([A-Z0-9]{2,}-[A-Z0-9]{2,}-[A-Z0-9]{2,})"], (0.4, 0.8, 0.9, 0.95)),
-            ],
-            
-            "gwr": [
-                TicketField("origin_station", [r"FROM\s+(.+?)(?:\s+TO|\s*$|[,\.])", r"(?:From|Origin)[:\s]+(.+?)(?:\s+to|\s*$|[,\.])"], (0.05, 0.2, 0.45, 0.3)),
-                TicketField("destination_station", [r"TO\s+(.+?)(?:\s*$|[,\.])", r"(?:To|Destination)[:\s]+(.+?)(?:\s*$|[,\.])"], (0.55, 0.2, 0.95, 0.3)),
-                TicketField("date", [r"VALID\s+(?:ON|FOR)\s+(.+?)(?:\s*$|[,\.])", r"(?:Date|Valid)[:\s]+(.+?)(?:\s*$|[,\.])"], (0.1, 0.3, 0.9, 0.4)),
-                TicketField("ticket_type", [r"(STANDARD|FIRST)\s+CLASS", r"(ANYTIME|OFF-PEAK|SUPER OFF-PEAK)"], (0.1, 0.4, 0.9, 0.5)),
-                TicketField("price", [r"£([0-9]+\.[0-9]{2})", r"GBP\s+([0-9]+\.[0-9]{2})"], (0.7, 0.7, 0.95, 0.8)),
-                TicketField("ticket_reference", [r"TICKET\s+NUMBER\s+([A-Z0-9-]+)", r"REF[:\s]+([A-Z0-9-]+)"], (0.4, 0.8, 0.9, 0.95)),
-            ],
-            
-           #TODO: Add more configurations for other UK rail operators (Southeastern, Northern, etc.)
-            "trainline_app": get_trainline_configuration(),
-            "generic_digital": get_trainline_configuration()
-        }
+        return DEFAULT_CONFIGURATIONS
+
+
+def _build_default_configurations():
+    """
+    Build the default configurations for common UK train tickets.
+    
+    :return: Dictionary of ticket configurations
+    """
+    # Digital tickets without a recognised operator are read with the Trainline layout
+    trainline_config = get_trainline_configuration()
+    configs = {
+        "generic": [
+            TicketField("origin_station", [r"^\s*(?:from|origin)[:\s]+([^,.\n]{1,40}?)(?:\s+to\b|\s*$|[,\.])"], (0.05, 0.2, 0.45, 0.4), psm=6),
+            TicketField("destination_station", [r"^\s*(?:to|destination)[:\s]+([^,.\n]{1,40}?)(?:\s*$|[,\.])"], (0.55, 0.2, 0.95, 0.4), psm=6),
+            TicketField("date", [r"^\s*(?:Date|Valid)[:\s]+([0-9]{1,2}[\/\.\-][0-9]{1,2}[\/\.\-][0-9]{2,4})", r"^\s*(?:Date|Valid)[:\s]+([0-9]{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+[0-9]{2,4})"], (0.1, 0.4, 0.9, 0.6), psm=6),
+            TicketField("ticket_type", [r"(?:Type|Class)[:\s]+([^,.\n]{1,30}?)(?:\s*$|[,\.])", r"(STANDARD|FIRST|1ST|ANYTIME|OFF-PEAK|SUPER OFF-PEAK)(?:\s+CLASS)?"], (0.1, 0.5, 0.9, 0.7), psm=6),
+            TicketField("price", [r"(?:Price|Cost|Fare)[:\s]*£?([0-9]+\.[0-9]{2})", r"£([0-9]+\.[0-9]{2})"], (0.7, 0.7, 0.95, 0.9), psm=6),
+            TicketField("ticket_reference", [r"^\s*(?:Reference|Ref)[:\s]*([A-Z0-9-]+)", r"([A-Z0-9]{2,}-[A-Z0-9]{2,}-[A-Z0-9]{2,})"], (0.4, 0.8, 0.9, 0.95), psm=6),
+        ],
+        
+        "gwr": [
+            TicketField("origin_station", [r"^\s*(?:from|origin)[:\s]+([^,.\n]{1,40}?)(?:\s+to\b|\s*$|[,\.])"], (0.05, 0.2, 0.45, 0.3), psm=6),
+            TicketField("destination_station", [r"^\s*(?:to|destination)[:\s]+([^,.\n]{1,40}?)(?:\s*$|[,\.])"], (0.55, 0.2, 0.95, 0.3), psm=6),
+            TicketField("date", [r"^\s*VALID\s+(?:ON|FOR)\s+([^,.\n]{1,64}?)(?:\s*$|[,\.])", r"^\s*(?:Date|Valid)[:\s]+([^,.\n]{1,64}?)(?:\s*$|[,\.])"], (0.1, 0.3, 0.9, 0.4), psm=6),
+            TicketField("ticket_type", [r"(?:STANDARD|FIRST)\s+CLASS", r"(ANYTIME|OFF-PEAK|SUPER OFF-PEAK)"], (0.1, 0.4, 0.9, 0.5), psm=6),
+            TicketField("price", [r"£([0-9]+\.[0-9]{2})", r"GBP\s+([0-9]+\.[0-9]{2})"], (0.7, 0.7, 0.95, 0.8), psm=6),
+            TicketField("ticket_reference", [r"^\s*TICKET\s+NUMBER\s+([A-Z0-9-]+)", r"^\s*REF[:\s]+([A-Z0-9-]+)"], (0.4, 0.8, 0.9, 0.95), psm=6),
+        ],
         
-        return configs
+       #TODO: Add more configurations for other UK rail operators (Southeastern, Northern, etc.)
+        "trainline_app": trainline_config,
+        "generic_digital": trainline_config
+    }
+    
+    return configs
+
+
+# Built once at import; TicketField instances are read-only during scanning so scanners share them
+DEFAULT_CONFIGURATIONS = _build_default_configurations()
 
 
+def _letter_mask(text):
+    """
+    Bitmask of the ASCII letters present in text, one bit per letter (case-insensitive).
+    """
+    mask = 0
+    for c in text.lower():
+        if 'a' <= c <= 'z':
+            mask |= 1 << (ord(c) - ord('a'))
+    return mask
+
+
+@lru_cache(maxsize=16)
+def _resolve_regions(regions, width, height):
+    """
+    Pixel rectangles of a configuration's relative regions for one image size.
+    Fields without a region get an empty (0, 0, 0, 0) rectangle.
+    """
+    regions = np.array([region or (0, 0, 0, 0) for region in regions], dtype=np.float64).reshape(-1, 4)
+    return tuple(map(tuple, (regions * (width, height, width, height)).astype(np.int32).tolist()))
+
+
+# Scanner owned by the current scan_many worker process
+_worker_scanner = None
+
+
+def _init_scan_worker(scanner_cls, scanner_kwargs):
+    """
+    Build the scanner once per worker so configuration setup is not repeated per image.
+    """
+    global _worker_scanner
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _worker_scanner = scanner_cls(**scanner_kwargs)
+
+
+def _scan_one(image_path):
+    """
+    Scan a single image in a worker process, reporting failures like the CLI does.
+    """
+    try:
+        return _worker_scanner.scan(image_path)
+    except Exception as e:
+        return {"error": str(e)}
+
 
 if __name__ == "__main__":
     import json
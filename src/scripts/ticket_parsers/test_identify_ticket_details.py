@@ -0,0 +1,97 @@
+import re
+
+import numpy as np
+import pytest
+
+from identify_ticket_details import DEFAULT_CONFIGURATIONS, TicketScanner
+from trainline_ticket_digital_config import PATTERN_FLAGS, TicketField, find_date, find_station_code
+
+
+def _extract_full_text(fields, full_text):
+    """
+    Extract region-less fields from full_text alone, so no OCR is needed.
+    """
+    scanner = TicketScanner(configurations={"test": fields})
+    image = np.full((10, 10, 3), 255, np.uint8)
+    return scanner._extract_ticket_details(image, "test", full_text=full_text)
+
+
+def test_region_less_fields_may_overlap():
+    fields = [
+        TicketField("ref", [r"REF[:\s]+([A-Z0-9]+)"]),
+        TicketField("code", [r"[0-9]{3}"]),
+    ]
+    details = _extract_full_text(fields, "REF: AB123")
+    assert details["ref"] == "REF: AB123"
+    assert details["code"] == "123"
+
+
+def test_region_less_field_prefers_first_listed_pattern():
+    fields = [TicketField("value", [r"foo", r"x\w+"])]
+    assert _extract_full_text(fields, "xxfoo")["value"] == "foo"
+
+
+def test_region_less_field_uses_finder_functions():
+    fields = [TicketField("travel_date", [find_date])]
+    assert _extract_full_text(fields, "Travel 08 Feb 2025")["travel_date"] == "08 Feb 2025"
+
+
+def test_station_correction_ignores_case():
+    scanner = TicketScanner()
+    scanner.extracted_data = {"origin_station": "LIVERPOOL LIME STREET"}
+    scanner._validate_and_correct_data()
+    assert scanner.extracted_data["origin_station"] == "Liverpool Lime Street"
+
+
+def test_find_date_allows_label_glued_to_day():
+    assert find_date("Date:08 Feb 2025") == "08 Feb 2025"
+    assert find_date("Valid:8 Mar 2025.") == "8 Mar 2025"
+    assert find_date("31 Feb 2025") is None
+
+
+def _search_in_order(patterns, text):
+    """
+    The matching TicketField.match replaces: each pattern searched on its own, in listed order.
+    """
+    for pattern in patterns:
+        if callable(pattern):
+            value = pattern(text)
+        else:
+            match = re.search(pattern, text, PATTERN_FLAGS)
+            value = match.group(0) if match else None
+        if value is not None:
+            return value
+    return None
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "SUPER OFF-PEAK",
+    "OFF-PEAK then SUPER OFF-PEAK",
+    "Anytime Return STANDARD CLASS",
+    "Type: Off-Peak Single, Adult",
+    "From: Liverpool Lime Street\nTo: Grantham\nDate: 08 Feb 2025",
+    "Origin LIV Destination GRA Out: 08 Feb 2025",
+    "Ref: AB-12-CD TICKET NUMBER XY-1 Price: £12.50",
+    "Trainline Eticket TTF7JRT2QVF 26-30 Railcard",
+    "\u017fuper O\u017f\u017f-Peak \u212aB-12-CD",
+    "Date:\x0b08 Feb 2025 Valid on 12/03/2024",
+])
+def test_match_agrees_with_searching_patterns_in_order(text):
+    for fields in DEFAULT_CONFIGURATIONS.values():
+        for ticket_field in fields:
+            assert ticket_field.match(text) == _search_in_order(ticket_field.patterns, text), ticket_field.name
+
+
+def test_select_configuration_prefers_earlier_listed_operator():
+    scanner = TicketScanner()
+    assert scanner._select_configuration("Booked with Trainline for GWR services") == "gwr"
+    assert scanner._select_configuration("no operator here") == "generic_digital"
+
+
+def test_find_station_code():
+    assert find_station_code("Liverpool") is None
+    assert find_station_code("aLVPb") == "LVP"
+    assert find_station_code("Liverpool LIV") == "LIV"
+    assert find_station_code("Gr\u00e4ntham \u00c9GRA") == "GRA"
+    assert find_station_code("\u00c9\u00c9A") is None
@@ -3,15 +3,224 @@ Corrected configuration for Trainline digital tickets based on actual ticket lay
 All region coordinates are properly normalized between 0 and 1.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple, Union
 
+try:
+    import re2
+except ImportError:  # RE2 is optional; patterns are compiled with the standard library instead
+    re2 = None
 
-@dataclass
+
+# Characters that give a pattern regex meaning beyond its literal text
+REGEX_SYNTAX = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+# Flags every field pattern is compiled with. Casing is handled here, so patterns need no
+# upper/mixed-case variants, and ticket text is ASCII so \s, \w and \d skip the Unicode tables.
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE | re.ASCII
+# The same flags inline, for RE2. RE2 has no ASCII flag: its \w and \d are ASCII, but it folds case
+# by Unicode rules (so "ſ" matches s) and its \s leaves out \v, so matching only trusts RE2 on
+# text that _re2_safe() accepts.
+RE2_FLAGS = "(?im)"
+
+# Maps every byte to 1 if it is an uppercase ASCII letter and 0 otherwise
+_UPPERCASE_BYTES = bytes(1 if ord("A") <= b <= ord("Z") else 0 for b in range(256))
+
+# Month number of each abbreviated month name, as printed in ticket dates
+_MONTH_ABBREVIATIONS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+
+def compile_pattern(pattern):
+    """
+    Compiles a field pattern, with RE2 when it is installed so matching noisy OCR text stays linear in its length.
+    Falls back to re for any pattern RE2 rejects, such as one using lookaround.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(RE2_FLAGS + pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, PATTERN_FLAGS)
+
+
+def _re2_safe(text):
+    """
+    Returns whether RE2 matches text exactly as re would with PATTERN_FLAGS.
+    """
+    return re2 is None or (text.isascii() and "\v" not in text)
+
+
+def _strip_group(pattern):
+    """
+    Removes one capture group wrapped around the whole pattern, if present.
+    A wrongly stripped pattern keeps an unbalanced parenthesis and so still counts as regex syntax.
+    """
+    if pattern.startswith("(") and pattern.endswith(")") and not pattern.startswith("(?"):
+        return pattern[1:-1]
+    return pattern
+
+
+def _as_literals(pattern):
+    """
+    Returns the plain-text alternatives of a pattern such as "(ADULT)" or "(ANYTIME|OFF-PEAK)"
+    if it has no other regex syntax, otherwise None.
+    """
+    alternatives = [_strip_group(alternative) for alternative in _strip_group(pattern).split("|")]
+    if all(alternative and not REGEX_SYNTAX.search(alternative) for alternative in alternatives):
+        return alternatives
+    return None
+
+
+def _find_literal(alternatives, pattern, text):
+    """
+    Returns the leftmost of a pattern's lower-cased plain-text alternatives found in text, ties going
+    to the first listed alternative as in a regex alternation, or None.
+    """
+    if not text.isascii():
+        # str.lower() (and RE2) fold non-ASCII letters that the ASCII-only pattern would not
+        match = re.search(pattern, text, PATTERN_FLAGS)
+        return match.group(0) if match else None
+    lowered = text.lower()
+    found = [(pos, i) for i, pos in enumerate(lowered.find(alternative) for alternative in alternatives)
+             if pos != -1]
+    if not found:
+        return None
+    pos, i = min(found)
+    return text[pos:pos + len(alternatives[i])]
+
+
+def find_station_code(text):
+    """
+    Returns the first run of three uppercase ASCII letters in text, such as a CRS station code, or None.
+    """
+    # Non-ASCII characters become a single "?" so byte positions still line up with the text
+    flags = text.encode("ascii", "replace").translate(_UPPERCASE_BYTES)
+    pos = flags.find(b"\x01\x01\x01")
+    return text[pos:pos + 3] if pos != -1 else None
+
+
+def find_date(text):
+    """
+    Returns the first "DD Mon YYYY" date in text that is a real calendar date, such as "08 Feb 2025", or None.
+    """
+    tokens = text.split()
+    # Look for the year first, as few tokens are four digits, then check the rest of the window
+    for i in range(2, len(tokens)):
+        year = tokens[i].rstrip(".,;:)")
+        if len(year) != 4 or not year.isdigit():
+            continue
+        day, month = tokens[i - 2], tokens[i - 1]
+        month_number = _MONTH_ABBREVIATIONS.get(month.lower())
+        # The day is the token's trailing digits, as OCR often glues a label to it ("Date:08")
+        day = day[-2:] if day[-2:].isdigit() else day[-1:]
+        if month_number is None or not day.isdigit():
+            continue
+        try:
+            date(int(year), month_number, int(day))
+        except ValueError:
+            continue
+        return f"{day} {month} {year}"
+    return None
+
+
+@dataclass(slots=True, frozen=True)
 class TicketField:
     name: str
-    patterns: List[str]
+    # Regex patterns, or functions returning the matched text or None, in priority order.
+    # Functions must come before any pattern that needs the regex engine. Stored as a tuple.
+    patterns: Sequence[Union[str, Callable[[str], Optional[str]]]]
     region: Optional[Tuple[float, float, float, float]] = None  # x1, y1, x2, y2 as ratios of width/height
+    psm: int = 7  # Tesseract page segmentation mode for the region (7 = single line)
+    finders: Tuple[Callable[[str], Optional[str]], ...] = field(init=False, repr=False, compare=False)
+    compiled: tuple = field(init=False, repr=False, compare=False)
+    combined: Optional[object] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Fields are frozen (and so hashable), so the derived attributes are set through object.__setattr__
+        patterns = tuple(self.patterns)
+        object.__setattr__(self, "patterns", patterns)
+
+        # Leading patterns that are plain text (or alternations of it) are matched with
+        # substring search instead of regex, alongside any finder functions
+        finders = []
+        for pattern in patterns:
+            if callable(pattern):
+                finders.append(pattern)
+                continue
+            alternatives = _as_literals(pattern)
+            if alternatives is None:
+                break
+            finders.append(partial(_find_literal, [alternative.lower() for alternative in alternatives], pattern))
+        object.__setattr__(self, "finders", tuple(finders))
+
+        regex_patterns = patterns[len(finders):]
+        if any(callable(pattern) for pattern in regex_patterns):
+            raise ValueError(f"{self.name}: finder functions must come before regex patterns")
+
+        # Compile once here so every scan reuses the same pattern objects
+        object.__setattr__(self, "compiled", tuple(compile_pattern(pattern) for pattern in regex_patterns))
+
+        # The remaining alternatives in one pattern, so most fields are settled by a single search
+        object.__setattr__(self, "combined", compile_pattern(
+            "|".join(f"(?P<alt{i}>{pattern})" for i, pattern in enumerate(regex_patterns))
+        ) if regex_patterns else None)
+
+    def match(self, text):
+        """
+        Returns the text matched by the first listed pattern that matches anywhere in text, or None.
+        """
+        for finder in self.finders:
+            value = finder(text)
+            if value is not None:
+                return value
+
+        if self.combined is None:
+            return None
+        if not _re2_safe(text):
+            # Rare text that RE2 would read differently is searched with re, one pattern at a time
+            for pattern in self.patterns[len(self.finders):]:
+                match = re.search(pattern, text, PATTERN_FLAGS)
+                if match:
+                    return match.group(0)
+            return None
+        match = self.combined.search(text)
+        if match is None:
+            return None
+        index = int(match.lastgroup[len("alt"):])
+        # Earlier patterns take priority; none of them matched at or before this position
+        for pattern in self.compiled[:index]:
+            earlier = pattern.search(text, match.start() + 1)
+            if earlier:
+                return earlier.group(0)
+        return match.group(0)
+
+
+class OperatorConfig(NamedTuple):
+    """
+    An operator's fields stored column-wise, so scanning loops zip over just the attributes they use.
+    """
+    names: Tuple[str, ...]
+    patterns: Tuple[Tuple[Union[str, Callable[[str], Optional[str]]], ...], ...]
+    regions: Tuple[Optional[Tuple[float, float, float, float]], ...]
+    psms: Tuple[int, ...]
+    matchers: Tuple[Callable[[str], Optional[str]], ...]
+
+    @classmethod
+    def from_fields(cls, fields):
+        """
+        Builds the column-wise form of a list of TicketField objects.
+        """
+        return cls(
+            names=tuple(ticket_field.name for ticket_field in fields),
+            patterns=tuple(ticket_field.patterns for ticket_field in fields),
+            regions=tuple(ticket_field.region for ticket_field in fields),
+            psms=tuple(ticket_field.psm for ticket_field in fields),
+            matchers=tuple(ticket_field.match for ticket_field in fields)
+        )
 
 
 def get_trainline_configuration():
@@ -19,6 +228,14 @@ def get_trainline_configuration():
     Returns configuration for Trainline mobile app tickets.
     Regions are defined as (x1, y1, x2, y2) coordinates, expressed as ratios of the image dimensions.
     All values are between 0 and 1.
+    The fields are built once at import and shared, as scanning never modifies them.
+    """
+    return _TRAINLINE_CONFIGURATION
+
+
+def _build_trainline_configuration():
+    """
+    Builds the Trainline field list returned by get_trainline_configuration().
     """
     return [
         # Title/Header - confirms it's a Trainline ticket
@@ -35,7 +252,7 @@ def get_trainline_configuration():
         TicketField(
             name="origin_station",
             patterns=[
-                r"([A-Za-z\s]+(?::STATIONS)?)",
+                r"([A-Za-z\s]{1,40}(?::STATIONS)?)",
             ],
             region=(0.0, 0.49, 0.5, 0.53)  # "LIVERPOOL STATIONS" text
         ),
@@ -44,16 +261,17 @@ def get_trainline_configuration():
         TicketField(
             name="origin_code",
             patterns=[
-                r"([A-Z]{3})"
+                find_station_code
             ],
-            region=(0, 0.53, 0.46, 0.6) 
+            region=(0, 0.53, 0.46, 0.6),
+            psm=8  # Single word
         ),
         
         # Destination station
         TicketField(
             name="destination_station",
             patterns=[
-                r"([A-Za-z\s]+)"
+                r"([A-Za-z\s]{1,40})"
             ],
             region=(0.5, 0.49, 1, 0.53)  # "GRANTHAM" text
         ),
@@ -63,17 +281,17 @@ def get_trainline_configuration():
             name="destination_code",
             patterns=[
                 r"(GRA)",
-                r"([A-Z]{3})"
+                find_station_code
             ],
-            region=(0.5, 0.5, 1, 0.61)   # "GRA" code
+            region=(0.5, 0.5, 1, 0.61),  # "GRA" code
+            psm=8  # Single word
         ),
         
         # Travel date
         TicketField(
             name="travel_date",
             patterns=[
-                r"(\d{2}\s+[A-Za-z]{3}\s+\d{4})",
-                r"08\s+Feb\s+2025"
+                find_date
             ],
             region=(0.29, 0.4, 0.6, 0.5)  # "08 Feb 2025" date
         ),
@@ -82,7 +300,7 @@ def get_trainline_configuration():
         TicketField(
             name="journey_direction",
             patterns=[
-                r"(Ret):\s+[A-Z]{3}\s*-\s*[A-Z]{3}",
+                r"Ret:\s+[A-Z]{3}\s*-\s*[A-Z]{3}",
                 r"Out:\s+[A-Z]{3}\s*-\s*[A-Z]{3}"
             ],
             region=(0.7, 0.4, 1, 0.49)  # "Ret: LVP - GRA" text
@@ -102,7 +320,7 @@ def get_trainline_configuration():
             name="route",
             patterns=[                     
                 r"(Any Permitted)",
-                r"(Not via .+|Via .+|Any Permitted)"
+                r"(Not via [^,.\n]{1,60}|Via [^,.\n]{1,60}|Any Permitted)"
             ],
             region=(0.7, 0.65, 1, 0.7)  # "Any Permitted" text
         ),
@@ -123,7 +341,7 @@ def get_trainline_configuration():
             patterns=[
                 r"(26-30 Railcard)",
                 r"(\d{2}-\d{2}\s+Railcard)",
-                r"([A-Za-z\s\-]+Railcard)"
+                r"([A-Za-z\s\-]{1,30}Railcard)"
             ],
             region=(0, 0.74, 0.3, 0.8)  # "26-30 Railcard" text
         ),
@@ -132,8 +350,7 @@ def get_trainline_configuration():
         TicketField(
             name="valid_until",
             patterns=[
-                r"(\d{2}\s+[A-Za-z]{3}\s+\d{4})",
-                r"07\s+Mar\s+2025"
+                find_date
             ],
             region=(0.7, 0.74, 1, 0.8)  # "07 Mar 2025" text
         ),
@@ -157,4 +374,7 @@ def get_trainline_configuration():
             ],
             region=(0.2, 0.25, 0.8, 0.35)  # Check for wallet button
         )
-    ]
\ No newline at end of file
+    ]
+
+
+_TRAINLINE_CONFIGURATION = _build_trainline_configuration()